@@ -1,2 +1,11 @@
-from .codeplagiarism import CodePlagiarismDetector
-from . import defaults
\ No newline at end of file
+from . import defaults
+
+
+def __getattr__(name):
+  # CodePlagiarismDetector transitively imports copydetect, numpy and
+  # boto3, so the import is deferred until the class is actually used.
+  # This keeps `python -m CodePlagDetector --help` and argparse errors fast.
+  if name == 'CodePlagiarismDetector':
+    from .codeplagiarism import CodePlagiarismDetector
+    return CodePlagiarismDetector
+  raise AttributeError("module {!r} has no attribute {!r}".format(__name__, name))
@@ -0,0 +1,52 @@
+"""
+Overlap-count kernel used by the comparison prefilter in codeplagiarism.
+
+When numba is installed, the count runs as a JIT-compiled linear merge
+over the two sorted fingerprint arrays with no Python frames at all.
+Otherwise it falls back to a vectorized numpy searchsorted, so numba
+stays an optional dependency.
+"""
+
+import numpy as np
+
+try:
+  import numba
+except ImportError:
+  numba = None
+
+
+def _overlap_count_np(test_fp, ref_fp):
+  """
+  Number of common values between two sorted unique int arrays,
+  computed with numpy searchsorted.
+  """
+  idx = np.searchsorted(test_fp, ref_fp).clip(max=test_fp.size - 1)
+  return int(np.count_nonzero(test_fp[idx] == ref_fp))
+
+
+if numba is not None:
+  @numba.njit(cache=True)
+  def overlap_count(test_fp, ref_fp):
+    # linear merge over two sorted unique arrays
+    i = j = count = 0
+    while i < test_fp.size and j < ref_fp.size:
+      if test_fp[i] == ref_fp[j]:
+        count += 1
+        i += 1
+        j += 1
+      elif test_fp[i] < ref_fp[j]:
+        i += 1
+      else:
+        j += 1
+    return count
+else:
+  overlap_count = _overlap_count_np
+
+
+def warmup():
+  """
+  Trigger the JIT compilation (a no-op without numba) before the worker
+  pool forks, so every worker inherits the compiled kernel.
+  """
+  dummy = np.zeros(1, dtype=np.int64)
+  overlap_count(dummy, dummy)
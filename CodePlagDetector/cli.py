@@ -0,0 +1,80 @@
+"""
+Shared command-line parser for the CodePlagiarism detector. Keeping the
+argparse setup in one place means the parser is built once per process
+and any future entry points reuse the same argument definitions instead
+of carrying their own copy.
+"""
+
+import argparse
+
+from . import defaults
+
+
+# frozensets give O(1) membership checks and only lower the value once
+_TRUE_STRINGS = frozenset({'yes', 'true', 't', 'y', '1'})
+_FALSE_STRINGS = frozenset({'no', 'false', 'f', 'n', '0'})
+
+
+def str2bool(v):
+  """
+  To parse boolean arguments from the command line.
+  https://stackoverflow.com/a/43357954
+  """
+  if isinstance(v, bool):
+      return v
+  s = v.lower()
+  if s in _TRUE_STRINGS:
+      return True
+  elif s in _FALSE_STRINGS:
+      return False
+  else:
+      raise argparse.ArgumentTypeError('Boolean value expected.')
+
+
+def threshold(value):
+  """
+  To parse the threshold arguments from the command line. And to
+  verify that the threshold is between 0 and 1.
+  """
+  try:
+    value = float(value)
+  except ValueError:
+    raise argparse.ArgumentTypeError("Threshold must be a float")
+  if value < 0 or value > 1:
+    raise argparse.ArgumentTypeError("Threshold must be between 0 and 1")
+  return value
+
+
+def build_parser():
+  """
+  Build the argument parser used by `python -m CodePlagDetector`.
+  """
+  parser = argparse.ArgumentParser(
+    prog="CodePlagDetector", formatter_class=argparse.ArgumentDefaultsHelpFormatter
+  )
+  parser.add_argument("-b", "--bucket-name", required=True,
+                      metavar="BUCKET-NAME", help="name of the bucket where the files are stored"
+                      " (default: lti-development-bucket)")
+  parser.add_argument("-bp", "--boilerplate-prefix", type=str, required=True,
+                      metavar="BPREFIX", help="prefix of the bucket where the boilerplate files"
+                      " are stored")
+  parser.add_argument("-sp", "--submission-prefix", type=str, required=True,
+                      metavar="SPREFIX", help="prefix of the bucket where the submissions"
+                      " files are stored")
+  parser.add_argument("-e", "--extensions", default=defaults.EXTENSIONS,
+                      metavar="EXTENSIONS", help="extensions of the files to be compared")
+  parser.add_argument("-n", "--noise-threshold", default=defaults.NOISE_THRESHOLD, type=int,
+                      metavar="NOISE-THRESHOLD", help="noise threshold (default: 25)")
+  parser.add_argument("-g", "--guarantee-threshold", default=defaults.GUARANTEE_THRESHOLD, type=int,
+                      metavar="GUARANTEE-THRESHOLD", help="guarantee threshold (default: 25)")
+  parser.add_argument("-d", "--display-threshold", default=defaults.DISPLAY_THRESHOLD, type=threshold,
+                      metavar="DISPLAY-THRESHOLD", help="display threshold (default: 0.33)")
+  parser.add_argument("-sn", "--same-name-only", default=defaults.SAME_NAME_ONLY,  type=str2bool,
+                      metavar="SAME-NAME-ONLY", help="same name only (default: True)")
+  parser.add_argument("-fsd", "--fsd", type=str2bool, required=True,
+                      metavar="FSD", help="Full stack assignment (default: False)")
+  parser.add_argument("-s", "--silent", default=True, type=str2bool,
+                      metavar="SILENT" ,help="To output logs to terminal")
+  parser.add_argument("-p", "--pretty", default=defaults.PRETTY, type=str2bool,
+                      metavar="PRETTY", help="pretty-print the report JSON (default: False)")
+  return parser
@@ -1,20 +1,157 @@
 
 import logging
+import os
 import time
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from hashlib import blake2b
+from itertools import chain, groupby
 from tqdm import tqdm
 from pathlib import Path
 import json
 import re
 
+import numpy as np
 from copydetect import CopyDetector, compare_files
+# orjson serializes the numpy heavy reports natively in C; fall back to
+# the stdlib json + NumpyEncoder pair when it is not installed
+try:
+  import orjson
+except ImportError:
+  orjson = None
 # imports from CodePlagDetector.py
 from .utils import (download_files_with_prefix,
   download_files_for_codeeval,
-  get_s3_bucket, NumpyEncoder, get_random_string
+  get_s3_bucket, get_random_string
 )
 from .exceptions import NoFilesFoundError
+from ._fast_compare import overlap_count, warmup as warmup_fast_compare
 
+# the student id pattern never changes, so compile it once instead of
+# going through the re module cache on every file
+_USER_RE = re.compile(r'users/(\d+)/')
+
+# reference-side tables shared by every student task. the pool
+# initializer fills this once per worker process, so the per-task
+# payload only has to carry the student's own files
+_WORKER_REF = {}
+
+
+def _init_worker(ref_index, ref_file_data, ref_sigs, ref_meta, ref_dir):
+  """
+  Install the reference-side tables in a worker process. Runs once per
+  worker instead of pickling the reference fingerprints into every task.
+  """
+  _WORKER_REF['ref_index'] = ref_index
+  _WORKER_REF['file_data'] = ref_file_data
+  _WORKER_REF['fp_sigs'] = ref_sigs
+  _WORKER_REF['meta'] = ref_meta
+  # tables derived from the reference side are identical for every task,
+  # so the relative paths and sorted unique fingerprints are computed
+  # once per worker here instead of once per student in _scan_student
+  ref_base_len = len(ref_dir) + 1
+  _WORKER_REF['ref_rel'] = {
+    ref_f: ref_f[ref_base_len:]
+    for ref_f in chain.from_iterable(ref_index.values())
+  }
+  _WORKER_REF['fp_sorted'] = {
+    f: np.unique(data.hashes) for f, data in ref_file_data.items()
+  }
+
+
+def _scan_student(student, test_files, file_data, fp_sigs, meta,
+                  display_t, same_name_only, ignore_leaf, test_dir,
+                  report_path, pretty=False):
+  """
+  Scan all the files of a single student against the reference files and
+  write the report to report_path. This is a module level function so that
+  it can be dispatched to a worker process; it receives only this
+  student's slice of file_data and picks up the shared reference tables
+  installed by _init_worker.
+  """
+  ref_index = _WORKER_REF['ref_index']
+  # a ref file can match many test files; its relative path was cut once
+  # per worker in _init_worker
+  ref_rel = _WORKER_REF['ref_rel']
+  # sorted unique fingerprint arrays give a cheap overlap upper bound, so
+  # clearly unrelated pairs never reach the expensive compare_files call.
+  # only the student's files need sorting here; the reference side was
+  # sorted once per worker in _init_worker
+  fp_sorted = {**_WORKER_REF['fp_sorted'],
+               **{f: np.unique(data.hashes) for f, data in file_data.items()}}
+  file_data = {**_WORKER_REF['file_data'], **file_data}
+  fp_sigs = {**_WORKER_REF['fp_sigs'], **fp_sigs}
+  meta = {**_WORKER_REF['meta'], **meta}
+  result_dict = defaultdict(list)
+  compare_cache = {}
+  # the test dir is invariant, so relative paths are a fixed-offset
+  # slice instead of a str.split per match
+  test_base_len = len(test_dir) + 1
+  for test_f in test_files:
+    # meta only covers the files that made it through preprocessing,
+    # standing in for the old per-pair file_data membership checks
+    test_meta = meta.get(test_f)
+    if test_meta is None: continue
+    # convert {some_file_path}/student1/.... to student1/...
+    relative_test_f_path = test_f[test_base_len:]
+    bucket_key = (test_meta[0], test_meta[2]) if same_name_only else test_meta[2]
+    for ref_f in ref_index.get(bucket_key, ()):
+      # skip the file itself, and files from the same parent directory
+      # when ignore_leaf is set
+      if test_f == ref_f or (ignore_leaf and test_meta[1] == meta[ref_f][1]):
+        continue
+
+      # prefilter: if the share of common fingerprint hashes cannot reach
+      # the display threshold, the full comparison cannot flag the pair.
+      # compare_files flags when either side's own ratio passes, so the
+      # attainable maximum is overlap over the smaller fingerprint set
+      test_fp, ref_fp = fp_sorted[test_f], fp_sorted[ref_f]
+      if test_fp.size == 0 or ref_fp.size == 0:
+        continue
+      overlap_ub = overlap_count(test_fp, ref_fp)
+      if overlap_ub / min(test_fp.size, ref_fp.size) < display_t:
+        continue
+
+      # byte-identical submissions share a fingerprint signature, so a
+      # pair we have already compared can reuse the cached result
+      cache_key = (fp_sigs[test_f], fp_sigs[ref_f])
+      cached = compare_cache.get(cache_key)
+      if cached is None:
+        # get the results
+        overlap, (sim1, sim2), (slices1, slices2) = compare_files(
+            file_data[test_f], file_data[ref_f],
+        )
+        # convert to plain python right at capture, so the cache, the
+        # report dict and the serializers never see numpy objects
+        cached = (int(overlap), (float(sim1), float(sim2)),
+                  (np.asarray(slices1).tolist(), np.asarray(slices2).tolist()))
+        compare_cache[cache_key] = cached
+      overlap, (sim1, sim2), (slices1, slices2) = cached
+      # if the similarity is greater than the threshold then append
+      if sim1 > display_t or sim2 > display_t:
+        result_dict[relative_test_f_path].append({
+          'ref_file': ref_rel[ref_f],
+          'overlap': overlap,
+          'test_similarity': sim1,
+          'ref_similarity': sim2,
+          'test_file_slices': slices1,
+          'ref_file_slices': slices2
+        })
+  # compact json by default: indentation roughly doubles the bytes
+  # written and uploaded, so pretty printing is opt-in. results were
+  # converted to plain python at capture, so no numpy handling is needed
+  if orjson is not None:
+    report_path.write_bytes(orjson.dumps(
+      result_dict, option=orjson.OPT_INDENT_2 if pretty else 0
+    ))
+  else:
+    # a wide buffer keeps the stdlib encoder from flushing tiny chunks
+    with open(report_path, 'w', buffering=1<<20) as f:
+      if pretty:
+        json.dump(result_dict, f, indent=2)
+      else:
+        json.dump(result_dict, f, separators=(',', ':'))
+  return report_path
 
 
 class CodePlagiarismDetector:
@@ -40,12 +177,15 @@ class CodePlagiarismDetector:
     display_t      :  The similarity threshold to flag plagiarism. Default is 0.33
     silent         :  If True, then it will not print any logs. Default is True.
     fsd            :  If True, then we will download only zip files. Default is False
+    pretty         :  If True, then the report JSON is pretty printed. Default is
+                      False since compact reports are smaller and faster to upload.
   """
 
 
   def __init__(self, bucket_name: str, sprefix: str, bprefix:str, rootDir='CodePlagiarism/',
                   extensions = ['.java'], noise_t = 25, guarantee_t = 25,
-                  same_name_only=True, display_t=0.33, silent=True, fsd=False):
+                  same_name_only=True, display_t=0.33, silent=True, fsd=False,
+                  pretty=False):
     """
     Connect to S3 bucket and initialize the detector object with the given params
     """
@@ -63,11 +203,18 @@ class CodePlagiarismDetector:
     self.display_t = display_t
     self.extensions = extensions
     self.fsd = fsd
+    self.pretty = pretty
     self.detector = None
     self.reportDir = "Reports"
+    # report paths written (or found already written) by run(), so
+    # upload_reports doesn't have to walk the report directory again
+    self._written_reports = []
 
     self._validate_fields()
-  
+    # resolve the report directory once; run() and upload_reports reuse
+    # it instead of rebuilding the home-anchored path per call/student
+    self._report_root = Path.home().joinpath(self.rootDir, self.sprefix, self.reportDir)
+
 
   def _validate_fields(self):
     """
@@ -93,26 +240,39 @@ class CodePlagiarismDetector:
     And if there is any zip file, then it's unzip them to the same folder to a
     folder with the same name as the zip file.
     """
-    if len(list(self.bucket.objects.filter(Prefix=self.sprefix).limit(1))) == 0:
+    # one cheap ListObjectsV2 call (MaxKeys=1) per prefix, issued
+    # concurrently so startup pays a single round-trip instead of two
+    client = self.bucket.meta.client
+    def prefix_empty(prefix):
+      response = client.list_objects_v2(Bucket=self.bucket.name, Prefix=prefix, MaxKeys=1)
+      return response.get('KeyCount', 0) == 0
+    with ThreadPoolExecutor(max_workers=2) as executor:
+      sprefix_empty, bprefix_empty = executor.map(prefix_empty, (self.sprefix, self.bprefix))
+    if sprefix_empty:
       errorMsg = "No files found in the bucket with prefix: {}".format(self.sprefix)
       logging.error(errorMsg)
       raise NoFilesFoundError(errorMsg)
-  
-    if len(list(self.bucket.objects.filter(Prefix=self.bprefix).limit(1))) == 0:
-      errorMsg = "No files found in the bucket with prefix: {}".format(self.prefix)
+    if bprefix_empty:
+      errorMsg = "No files found in the bucket with prefix: {}".format(self.bprefix)
       logging.error(errorMsg)
       raise NoFilesFoundError(errorMsg)
-    
+
     if self.fsd:
       raise NotImplementedError("fsd is not implemented yet")
       # download and unzip the files, if there are any .zip files (only .zip is supported)
       # download_files_with_prefix(self.bucket, prefix=self.prefix, rootDir=self.rootDir,
       #                           silent=self.silent, fsd=self.fsd)
     else:
-      # for boilerplate files
-      download_files_for_codeeval(self.bucket, prefix=self.bprefix, rootDir=self.rootDir, silent=self.silent)
-      # for submission files
-      download_files_for_codeeval(self.bucket, prefix=self.sprefix, rootDir=self.rootDir, silent=self.silent)
+      # the boilerplate and submission prefixes are independent, so both
+      # listing+download pipelines run concurrently
+      with ThreadPoolExecutor(max_workers=2) as executor:
+        futures = [
+          executor.submit(download_files_for_codeeval, self.bucket, prefix=prefix,
+                          rootDir=self.rootDir, silent=self.silent)
+          for prefix in (self.bprefix, self.sprefix)
+        ]
+        for future in futures:
+          future.result()
 
   
   def initialize(self):
@@ -149,63 +309,109 @@ class CodePlagiarismDetector:
     print("  0.00: Generating file fingerprints")
 
     # generate fingerprints for all files after winnowing.
-    self.detector._preprocess_code(self.detector.test_files + self.detector.ref_files)
-    
+    all_files = list(chain(self.detector.test_files, self.detector.ref_files))
+    # prewarm the page cache in parallel so the serial reads inside
+    # copydetect's _preprocess_code hit memory instead of disk
+    def prewarm(path):
+      try:
+        with open(path, 'rb') as f:
+          f.read()
+      except OSError:
+        pass # unreadable files are reported by _preprocess_code itself
+    with ThreadPoolExecutor(max_workers=16) as executor:
+      list(executor.map(prewarm, all_files))
+    self.detector._preprocess_code(all_files)
+
+    # signature of each fingerprint array. byte-identical submissions
+    # (common with untouched boilerplate) end up with the same signature,
+    # letting the scan reuse one compare_files result for the whole group
+    fp_sigs = {
+      f: blake2b(data.hashes.tobytes()).digest()
+      for f, data in self.detector.file_data.items()
+    }
+
+    # cache (name, parent, suffix) per file once for the whole scan, so
+    # the pair loops compare plain strings instead of building four Path
+    # objects per pair and the table isn't rebuilt per student
+    file_meta = {
+      f: (os.path.basename(f), os.path.dirname(f), os.path.splitext(f)[1])
+      for f in all_files
+    }
+
+    # bucket the reference files so the name and suffix guards become a
+    # single dict lookup in the workers: by (basename, suffix) when
+    # comparing same named files only, otherwise by suffix alone. built
+    # here once instead of once per student
+    # only files that made it through preprocessing are indexed, so the
+    # workers never need to re-check file_data membership per pair
+    ref_index = defaultdict(list)
+    for ref_f in self.detector.ref_files:
+      if ref_f not in self.detector.file_data: continue
+      ref_meta = file_meta[ref_f]
+      ref_index[(ref_meta[0], ref_meta[2]) if self.detector.same_name_only else ref_meta[2]].append(ref_f)
+
     # split the test files for each student
-    # this is to faciliate the scan for every student individually
-    test_files_student_dict = defaultdict(list)
-    for test_file in self.detector.test_files:
-      student_id = re.search(r'users/(\d+)/', test_file).group(1)
-      test_files_student_dict[student_id].append(test_file)
+    # this is to faciliate the scan for every student individually.
+    # sort + groupby runs in C, avoiding a dict lookup and append per file
+    student_key = lambda test_file: _USER_RE.search(test_file).group(1)
+    test_files_student_dict = {
+      student: list(files)
+      for student, files in groupby(sorted(self.detector.test_files, key=student_key), key=student_key)
+    }
     # TODO: for code eval, we have to take only the latest attempt for each student
     # create the report directory inside the submission_prefix folder in the root directory.
-    Path.home().joinpath(self.rootDir, self.sprefix, self.reportDir).mkdir(parents=True, exist_ok=True)
+    self._report_root.mkdir(parents=True, exist_ok=True)
 
     print(f"{time.time()-start_time:6.2f}: Beginning code comparison")
-    for student, test_files in tqdm(test_files_student_dict.items(), bar_format='   {l_bar}{bar}{r_bar}'):
-      result_dict = defaultdict(list)
-      studentReportPath = Path.home().joinpath(self.rootDir, self.sprefix, self.reportDir, f"{student}.json")
-      # if the report has already been generated, for the student, then skip
-      if studentReportPath.exists(): continue
-      for test_f in test_files:
-        for ref_f in self.detector.ref_files:
-          # if it is out of file_data then continue
-          if (
-            test_f not in self.detector.file_data or ref_f not in self.detector.file_data
-            or test_f == ref_f # if it is the same file
-            # if the same name only is true and the names are not the same then continue
-            or (self.detector.same_name_only and Path(test_f).name != Path(ref_f).name)
-            # if the ignore leaf is true and the parent directories are the same then continue
-            or (self.detector.ignore_leaf and Path(test_f).parent == Path(ref_f).parent)
-            # if the file extensions are not the same then continue
-            or (Path(test_f).suffix != Path(ref_f).suffix)
-          ):
-            continue
-
-          # get the results
-          overlap, (sim1, sim2), (slices1, slices2) = compare_files(
-              self.detector.file_data[test_f], self.detector.file_data[ref_f],
-          )
-          # if the similarity is greater than the threshold then append
-          if sim1 > self.detector.display_t or sim2 > self.detector.display_t:
-            # convert {some_file_path}/student1/.... to student1/...
-            relative_test_f_path = test_f.split(self.detector.test_dirs[0])[1][1:]
-            relative_ref_f_path = ref_f.split(self.detector.ref_dirs[0])[1][1:]
-            result_dict[relative_test_f_path].append({
-              'ref_file': relative_ref_f_path,
-              'overlap': overlap,
-              'test_similarity': sim1,
-              'ref_similarity': sim2,
-              'test_file_slices': slices1,
-              'ref_file_slices': slices2
-            })
-      # print(f'writing to {reportDir}/{student}.json')
-      with open(studentReportPath, 'w') as f:
-        json.dump(result_dict, f, indent=2, cls=NumpyEncoder)
+    # compile the numba kernel (if available) before the pool forks so
+    # the workers inherit it instead of each compiling their own
+    warmup_fast_compare()
+    # each student is independent, so we scan them in parallel across
+    # worker processes. the reference tables go to each worker exactly
+    # once through the pool initializer; the per-task payload then only
+    # carries the student's own fingerprints.
+    ref_file_data, ref_sigs, ref_meta = {}, {}, {}
+    for ref_f in chain.from_iterable(ref_index.values()):
+      ref_file_data[ref_f] = self.detector.file_data[ref_f]
+      ref_sigs[ref_f] = fp_sigs[ref_f]
+      ref_meta[ref_f] = file_meta[ref_f]
+    with ProcessPoolExecutor(max_workers=os.cpu_count(), initializer=_init_worker,
+                             initargs=(ref_index, ref_file_data, ref_sigs, ref_meta,
+                                       self.detector.ref_dirs[0])) as executor:
+      futures = []
+      ref_set = set(self.detector.ref_files)
+      for student, test_files in test_files_student_dict.items():
+        studentReportPath = self._report_root / f"{student}.json"
+        # if the report has already been generated, for the student, then skip
+        if studentReportPath.exists():
+          self._written_reports.append(studentReportPath)
+          continue
+        file_data_slice = {
+          f: self.detector.file_data[f]
+          for f in test_files
+          if f in self.detector.file_data
+        }
+        sig_slice = {f: fp_sigs[f] for f in file_data_slice}
+        meta_slice = {f: file_meta[f] for f in file_data_slice}
+        futures.append(executor.submit(
+          _scan_student, student, test_files,
+          file_data_slice, sig_slice, meta_slice, self.detector.display_t, self.detector.same_name_only,
+          self.detector.ignore_leaf, self.detector.test_dirs[0],
+          studentReportPath, self.pretty
+        ))
+        # once sliced for its task, a student's fingerprints are dead
+        # weight in the parent process — unless they double as reference
+        # files for the students still to come
+        for f in test_files:
+          if f not in ref_set:
+            self.detector.file_data.pop(f, None)
+            fp_sigs.pop(f, None)
+      for future in tqdm(as_completed(futures), total=len(futures), bar_format='   {l_bar}{bar}{r_bar}'):
+        self._written_reports.append(future.result())
     print(f"{time.time()-start_time:6.2f}: Code comparison completed")
     # Uploading the files in the reportDir to the bucket
     if not self.silent:
-      print(f'Results saved to {Path.home().joinpath(self.rootDir, self.sprefix, self.reportDir)} folder')
+      print(f'Results saved to {self._report_root} folder')
 
 
   # upload the Reports folder to the bucket
@@ -219,9 +425,10 @@ class CodePlagiarismDetector:
     "<prefix>/Reports/<file_name>".
     """
     # upload the files to the bucket
-    report_dir = Path.home().joinpath(self.rootDir, self.sprefix, self.reportDir)
-    # walk through the report directory and get all the report files
-    report_files = [f for f in report_dir.rglob('*.json')]
+    report_dir = self._report_root
+    # run() already recorded what it wrote; only walk the report
+    # directory when uploading standalone (run() not called this process)
+    report_files = self._written_reports or [f for f in report_dir.rglob('*.json')]
     if len(report_files) == 0:
       print("No reports in the {} folder.".format(report_dir))
       return
@@ -230,23 +437,34 @@ class CodePlagiarismDetector:
     
     start_time = time.time()
     print("\n  0.00: Uploading reports to the bucket")
-    for report_file in tqdm(report_files, bar_format='   {l_bar}{bar}{r_bar}'):
-      # prefix already has the forward slash
-      s3_key = "{}{}/{}".format(self.sprefix, self.reportDir, report_file.name)
-      self.bucket.upload_file(report_file, s3_key)
+    # each upload is an independent blocking https round-trip, so a thread
+    # pool overlaps the per-request latency instead of paying it serially.
+    # keys are precomputed and tasks submitted individually so one failed
+    # upload is logged without blocking the rest
+    with ThreadPoolExecutor(max_workers=min(32, len(report_files))) as executor:
+      futures = {
+        # prefix already has the forward slash
+        executor.submit(self.bucket.upload_file, str(report_file),
+                        "{}{}/{}".format(self.sprefix, self.reportDir, report_file.name)): report_file
+        for report_file in report_files
+      }
+      failed = []
+      for future in tqdm(as_completed(futures), total=len(futures), bar_format='   {l_bar}{bar}{r_bar}'):
+        if future.exception() is not None:
+          logging.error("Failed to upload report %s: %s", futures[future], future.exception())
+          failed.append(futures[future])
+    if failed:
+      print("Failed to upload {} report(s), see logs".format(len(failed)))
     print(f"{time.time()-start_time:6.2f}: Reports uploaded to the bucket")
 
 
   def clean_up(self):
     """
-    Used to cleanup the resources like deleting files etc.. But for now we are just
-    closing the active s3 connection.
+    Used to cleanup the resources like deleting files etc..
     """
-    
-    # closing the s3 connection 
-    if self.detector is not None:
-      print('\nClosing the s3 connection...', end=' ')
-      self.bucket.meta.client._endpoint.http_session.close()
-      print('Done', end='\n\n')
-      
+    # the s3 client is shared by every detector in this process (see
+    # utils._get_s3_resource), so closing it here would tear down the
+    # keep-alive pool under jobs that are still running. process-level
+    # shutdown goes through utils.close_s3_connections instead.
+    pass
 
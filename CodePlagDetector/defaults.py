@@ -3,4 +3,5 @@ GUARANTEE_THRESHOLD = 25
 DISPLAY_THRESHOLD = 0.33
 SAME_NAME_ONLY = True
 EXTENSIONS = '.java'
-FSD = True
\ No newline at end of file
+FSD = True
+PRETTY = False
\ No newline at end of file
@@ -1,18 +1,130 @@
 import boto3
+import io
+from boto3.s3.transfer import TransferConfig
+from botocore.config import Config
+from botocore.exceptions import ClientError, EndpointConnectionError, NoCredentialsError
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import zipfile
 
 from .exceptions import s3ConnectionError, NoBucketProvidedError
 import logging
+import threading
 import numpy as np
 import json
 import os
+import shutil
 
+import hashlib
 import time
-import random
 import string
 
 
+# alphabet for get_random_string, built once; indexing it with raw
+# os.urandom bytes avoids the per-call pool list random.choices builds
+_ALPHABET = (string.ascii_uppercase + string.digits).encode()
+
+
+# larger objects (zip submissions mostly) download as concurrent byte
+# ranges instead of one TCP stream; small files are unaffected since
+# they stay below the multipart threshold
+# archives below this size are fetched and extracted entirely in memory;
+# anything bigger goes to disk first so a run never balloons its RSS on
+# one oversized submission
+_ZIP_MEMORY_LIMIT = 16 * 1024 * 1024
+
+_TRANSFER_CONFIG = TransferConfig(
+  multipart_threshold=8 * 1024 * 1024,
+  multipart_chunksize=8 * 1024 * 1024,
+  max_concurrency=16,
+  use_threads=True,
+)
+
+
+# building a boto3 resource loads credentials and service models and
+# sets up the HTTPS pool — hundreds of ms — so each process keeps one
+# resource per region and every request reuses its keep-alive pool
+_S3_RESOURCES = {}
+_S3_RESOURCES_LOCK = threading.Lock()
+
+
+def _get_s3_resource(region_name, access_key_id, access_key_secret):
+  with _S3_RESOURCES_LOCK:
+    resource = _S3_RESOURCES.get(region_name)
+    if resource is None:
+      resource = _S3_RESOURCES[region_name] = boto3.resource(
+        service_name='s3',
+        region_name=region_name,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=access_key_secret,
+        # the download/upload thread pools all share this client, so the
+        # connection pool has to be wide enough that workers reuse pooled
+        # keep-alive connections instead of dialing new TLS sessions
+        config=Config(
+          max_pool_connections=64,
+          retries={'max_attempts': 10, 'mode': 'adaptive'},
+          tcp_keepalive=True,
+        )
+      )
+    return resource
+
+
+# bucket validation wants the opposite tuning from the transfer client:
+# a misconfigured bucket or endpoint should fail in a couple of seconds
+# instead of sitting through the adaptive retry schedule
+_VALIDATION_CLIENTS = {}
+
+
+def _get_validation_client(region_name, access_key_id, access_key_secret):
+  with _S3_RESOURCES_LOCK:
+    client = _VALIDATION_CLIENTS.get(region_name)
+    if client is None:
+      client = _VALIDATION_CLIENTS[region_name] = boto3.client(
+        service_name='s3',
+        region_name=region_name,
+        aws_access_key_id=access_key_id,
+        aws_secret_access_key=access_key_secret,
+        config=Config(
+          retries={'mode': 'standard', 'max_attempts': 2},
+          connect_timeout=2,
+          read_timeout=5,
+        )
+      )
+    return client
+
+
+# bucket name -> time of the last successful head_bucket; entries
+# younger than the TTL skip the HEAD round trip entirely
+_VALIDATED_BUCKETS = {}
+_VALIDATED_TTL = 600  # seconds
+
+
+def invalidate_bucket_validation(bucket_name):
+  """
+  Forget a memoized head_bucket success, forcing the next
+  get_s3_bucket call to re-validate. Callers should use this when a
+  downstream ClientError suggests the bucket went away.
+  """
+  with _S3_RESOURCES_LOCK:
+    _VALIDATED_BUCKETS.pop(bucket_name, None)
+
+
+def close_s3_connections():
+  """
+  Close the process-shared S3 clients and forget the cached resources
+  and bucket validations. Only meant for process shutdown: every
+  detector in the process shares these connection pools.
+  """
+  with _S3_RESOURCES_LOCK:
+    for resource in _S3_RESOURCES.values():
+      resource.meta.client._endpoint.http_session.close()
+    _S3_RESOURCES.clear()
+    for client in _VALIDATION_CLIENTS.values():
+      client._endpoint.http_session.close()
+    _VALIDATION_CLIENTS.clear()
+    _VALIDATED_BUCKETS.clear()
+
+
 def get_s3_bucket(bucket_name, region_name='us-east-1'):
   """
   This function returns the S3 bucket object if the bucket exists and the
@@ -39,30 +151,205 @@ def get_s3_bucket(bucket_name, region_name='us-east-1'):
   if access_key_id is None or access_key_secret is None:
     raise s3ConnectionError("AWS credentials not provided.")
   
-  s3 = boto3.resource(
-    service_name='s3',
-    region_name=region_name,
-    aws_access_key_id=access_key_id,
-    aws_secret_access_key=access_key_secret
-  )
+  s3 = _get_s3_resource(region_name, access_key_id, access_key_secret)
+
+  # a recent successful head_bucket means the HEAD round trip can be
+  # skipped for this mostly-static set of buckets
+  with _S3_RESOURCES_LOCK:
+    validated_at = _VALIDATED_BUCKETS.get(bucket_name)
+  if validated_at is not None and time.time() - validated_at < _VALIDATED_TTL:
+    print("successful!\n")
+    return s3.Bucket(bucket_name)
+
   try:
-    s3.meta.client.head_bucket(Bucket=bucket_name)
+    # existence check goes through the fail-fast client; the shared
+    # transfer client keeps its patient retry schedule for downloads
+    _get_validation_client(region_name, access_key_id, access_key_secret).head_bucket(
+      Bucket=bucket_name)
+    with _S3_RESOURCES_LOCK:
+      _VALIDATED_BUCKETS[bucket_name] = time.time()
     print("successful!\n")
     return s3.Bucket(bucket_name)
-  except:
+  except ClientError as e:
+    if e.response.get('Error', {}).get('Code') == '404':
+      errorMsg = f"s3 bucket does not exist: {bucket_name}"
+    else:
+      errorMsg = f"Failed to connect to s3 bucket: {bucket_name}"
+    logging.error(errorMsg)
+    raise s3ConnectionError(errorMsg)
+  except (EndpointConnectionError, NoCredentialsError):
     errorMsg = f"Failed to connect to s3 bucket: {bucket_name}"
     logging.error(errorMsg)
     raise s3ConnectionError(errorMsg)
 
 
+def _iter_objects(bucket, prefix):
+  """
+  Iterate the raw list_objects_v2 entries under prefix. The low-level
+  paginator yields plain dicts, skipping the ObjectSummary resource
+  wrapper boto3 builds per key for bucket.objects.filter().
+  """
+  paginator = bucket.meta.client.get_paginator('list_objects_v2')
+  for page in paginator.paginate(Bucket=bucket.name, Prefix=prefix):
+    yield from page.get('Contents', ())
+
+
+# repeated runs against the same prefix re-list S3 at full cost, so
+# listings are cached on disk for a short while
+_LISTING_CACHE_DIR = Path.home().joinpath('.cache', 'codeplagdetector', 'listings')
+_LISTING_TTL = 300  # seconds
+
+
+def _listing_cache_path(bucket_name, prefix):
+  digest = hashlib.blake2b(f'{bucket_name}/{prefix}'.encode(), digest_size=16).hexdigest()
+  return _LISTING_CACHE_DIR.joinpath(digest + '.json')
+
+
+def invalidate_listing_cache(bucket_name, prefix):
+  """
+  Drop the cached listing for (bucket_name, prefix) so the next download
+  pass re-lists the bucket. Meant for callers (e.g. the API handler)
+  that know new objects just landed.
+  """
+  try:
+    _listing_cache_path(bucket_name, prefix).unlink()
+  except FileNotFoundError:
+    pass
+
+
+def _list_objects_cached(bucket, prefix, ttl=_LISTING_TTL):
+  """
+  List the objects under prefix, reusing an on-disk cache entry if one
+  exists and is younger than ttl seconds. Entries keep the key, etag,
+  size and last-modified fields from ListObjectsV2.
+  """
+  cache_path = _listing_cache_path(bucket.name, prefix)
+  try:
+    if time.time() - cache_path.stat().st_mtime < ttl:
+      with open(cache_path) as cache_file:
+        return json.load(cache_file)
+  except (OSError, ValueError):
+    pass
+
+  listing = [{
+    'Key': entry['Key'],
+    'ETag': entry.get('ETag'),
+    'Size': entry.get('Size'),
+    'LastModified': entry['LastModified'].isoformat() if entry.get('LastModified') else None,
+  } for entry in _iter_objects(bucket, prefix)]
+
+  # write to a sibling tmp file and rename, so concurrent readers never
+  # see a half-written cache entry
+  _LISTING_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+  tmp_path = cache_path.with_suffix('.tmp')
+  tmp_path.write_text(json.dumps(listing))
+  os.replace(tmp_path, cache_path)
+  return listing
+
+
 def download_files_for_codeeval(bucket, prefix, rootDir='', silent=True):
   """
   This is to download files for codeeval. Here, we assume that the boilerplate
   and the submission paths are different.
+
+  The downloads are network bound, so they are fanned out over a thread
+  pool instead of fetching one object at a time.
   """
-  for obj in bucket.objects.filter(Prefix=prefix):
-    destFilePath = Path.home().joinpath(rootDir, prefix, obj.key.replace(prefix, ''))
-    download_from_s3(bucket, obj.key, destFilePath, silent=silent)
+  # the root path and prefix length are loop invariants, so they are
+  # computed once; the hot loop only does one os.path.join per key
+  root = str(Path.home().joinpath(rootDir, prefix))
+  prefix_len = len(prefix)
+  # one walk over the destination tree replaces a stat() per object
+  existing = _index_local_tree(root)
+  to_download = []
+  for entry in _list_objects_cached(bucket, prefix):
+    key = entry['Key']
+    # slicing off the prefix also stays correct when the prefix text
+    # repeats later in the key, which str.replace did not
+    destFilePath = os.path.join(root, key[prefix_len:].lstrip('/'))
+    if destFilePath in existing:
+      if not silent:
+        print('Already downloaded', key)
+      continue
+    to_download.append((key, destFilePath))
+  # create each distinct parent directory once up front instead of a
+  # mkdir -p per file in the workers
+  for parent in {os.path.dirname(dest) for _, dest in to_download}:
+    os.makedirs(parent, exist_ok=True)
+  with ThreadPoolExecutor(max_workers=_download_concurrency()) as executor:
+    list(executor.map(
+      lambda item: download_from_s3(bucket, item[0], item[1], silent=silent),
+      to_download
+    ))
+
+
+def _index_local_tree(root):
+  """
+  Walk root once and return the set of file paths already on disk, so
+  the download loops test membership instead of stat()ing per object.
+  """
+  existing = set()
+  for dirpath, _, filenames in os.walk(root):
+    for name in filenames:
+      existing.add(os.path.join(dirpath, name))
+  return existing
+
+
+def _extract_zip(archive, extract_dir):
+  """
+  Extract every entry of a zip archive to extract_dir, decompressing
+  entries in parallel. zlib releases the GIL, so thread workers scale
+  with cores. ZipFile handles are not thread safe, so each worker thread
+  opens its own handle. archive is either the raw bytes of the zip or a
+  path to it on disk.
+  """
+  def open_zip():
+    if isinstance(archive, (bytes, bytearray)):
+      return zipfile.ZipFile(io.BytesIO(archive))
+    return zipfile.ZipFile(archive)
+
+  def member_dest(filename):
+    # archives are student uploads, so member names are untrusted:
+    # mirror ZipFile._extract_member's cleaning (drop drive letters and
+    # '..'/'.' parts) so a crafted name cannot escape extract_dir
+    arcname = filename.replace('/', os.sep)
+    if os.altsep:
+      arcname = arcname.replace(os.altsep, os.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [p for p in arcname.split(os.sep)
+             if p not in ('', os.curdir, os.pardir)]
+    return Path(extract_dir).joinpath(*parts)
+
+  with open_zip() as zf:
+    infos = zf.infolist()
+  # create the directory tree up front so the workers only write files
+  for info in infos:
+    dest = member_dest(info.filename)
+    (dest if info.is_dir() else dest.parent).mkdir(parents=True, exist_ok=True)
+
+  local = threading.local()
+  def extract_one(info):
+    zf = getattr(local, 'zf', None)
+    if zf is None:
+      zf = local.zf = open_zip()
+    if info.compress_type == zipfile.ZIP_STORED:
+      # stored entries are raw bytes, so stream them out in 1 MiB chunks
+      # instead of zf.extract's 64 KiB read/write loop
+      with zf.open(info) as src, open(member_dest(info.filename), 'wb') as dst:
+        shutil.copyfileobj(src, dst, length=1 << 20)
+    else:
+      zf.extract(info, extract_dir)
+
+  with ThreadPoolExecutor(max_workers=min(8, os.cpu_count() or 1)) as executor:
+    list(executor.map(extract_one, [info for info in infos if not info.is_dir()]))
+
+
+def _download_concurrency():
+  """
+  Number of concurrent S3 downloads, overridable through the
+  CPD_DL_CONCURRENCY environment variable.
+  """
+  return int(os.environ.get('CPD_DL_CONCURRENCY', 32))
 
 def download_from_s3(bucket, object_key, destFilePath, silent=True):
   """
@@ -73,17 +360,16 @@ def download_from_s3(bucket, object_key, destFilePath, silent=True):
     bucket       : The S3 bucket object
     object_key   : The key of the object in the bucket
     destFilePath : The path where the file will be downloaded to. This path should include
-                   the file name as well.
+                   the file name as well. Its parent directory must already exist;
+                   the callers pre-create the distinct parents in one pass.
   Returns
   -------
     None
   """
-  # create all the necessary parent directories if not present
-  Path(destFilePath).parent.mkdir(parents=True, exist_ok=True)
-  if not Path.exists(destFilePath):
+  if not os.path.exists(destFilePath):
     if not silent:
       print('Downloading', object_key, ' to ', destFilePath)
-    bucket.download_file(object_key, destFilePath)
+    bucket.download_file(object_key, destFilePath, Config=_TRANSFER_CONFIG)
   else:
     if not silent:
       print('Already downloaded', object_key)
@@ -113,31 +399,55 @@ def download_files_with_prefix(bucket, prefix, rootDir='', silent=True, fsd=True
     None
 
   """
-  # download the files from the bucket with prefix CodePlagiarism
-  for obj in bucket.objects.filter(Prefix=prefix):
-    destFilePath = Path.home().joinpath(rootDir, obj.key)
-    # create all the necessary parent directories if not present
-    Path(destFilePath).parent.mkdir(parents=True, exist_ok=True)
-    # if it is a file then download
-    if obj.key[-1] != '/':
-      if not Path.exists(destFilePath):
-        # if fsd, then download only zip files
-        if fsd:
-          if obj.key[-4:] == '.zip':
-            if not silent:
-              print('Downloading', obj.key, 'to', destFilePath)
-            bucket.download_file(obj.key, destFilePath)
-            # extracting abc/xyz.zip to abc/xyz folder
-            Path(destFilePath).parent.joinpath(Path(destFilePath).name[:-4]).mkdir(parents=True, exist_ok=True)
-            with zipfile.ZipFile(destFilePath, 'r') as zip_ref:
-              zip_ref.extractall(Path(destFilePath).parent.joinpath(Path(destFilePath).name[:-4]))
-        else:
+  # the destination root is a loop invariant; the workers then only do
+  # one os.path.join per key
+  root = str(Path.home().joinpath(rootDir))
+  # one walk over the destination tree replaces a stat() per object
+  existing = _index_local_tree(os.path.join(root, prefix))
+  objs = [obj for obj in bucket.objects.filter(Prefix=prefix) if obj.key[-1] != '/']
+  # create each distinct parent directory once up front instead of a
+  # mkdir -p per file in the workers
+  for parent in {os.path.dirname(os.path.join(root, obj.key)) for obj in objs}:
+    os.makedirs(parent, exist_ok=True)
+
+  def download_one(obj):
+    destFilePath = os.path.join(root, obj.key)
+    if destFilePath not in existing:
+      # if fsd, then download only zip files
+      if fsd:
+        if obj.key[-4:] == '.zip':
           if not silent:
             print('Downloading', obj.key, 'to', destFilePath)
-          bucket.download_file(obj.key, destFilePath)
+          # the listing already carries the object size, so pick the
+          # transfer strategy without an extra head_object call
+          if obj.size < _ZIP_MEMORY_LIMIT:
+            # small archives: fetch the bytes once, persist with a
+            # single write and extract straight from memory
+            archive = bucket.meta.client.get_object(Bucket=bucket.name, Key=obj.key)['Body'].read()
+            with open(destFilePath, 'wb') as dest_file:
+              dest_file.write(archive)
+          else:
+            # large archives: ranged multipart download to disk, then
+            # extract from the file instead of holding it all in memory
+            bucket.download_file(obj.key, destFilePath, Config=_TRANSFER_CONFIG)
+            archive = destFilePath
+          # extracting abc/xyz.zip to abc/xyz folder
+          extract_dir = destFilePath[:-4]
+          os.makedirs(extract_dir, exist_ok=True)
+          _extract_zip(archive, extract_dir)
       else:
         if not silent:
-          print('Already downloaded', obj.key)
+          print('Downloading', obj.key, 'to', destFilePath)
+        bucket.download_file(obj.key, destFilePath, Config=_TRANSFER_CONFIG)
+    else:
+      if not silent:
+        print('Already downloaded', obj.key)
+
+  # download the files from the bucket with prefix CodePlagiarism.
+  # per-object downloads are independent network I/O, so they run on a
+  # thread pool just like download_files_for_codeeval
+  with ThreadPoolExecutor(max_workers=_download_concurrency()) as executor:
+    list(executor.map(download_one, objs))
 
 
 def get_random_string(length):
@@ -151,9 +461,18 @@ def get_random_string(length):
   -------
     timestamp_randomstring : the random string with timestamp
   """
-  timestamp = time.strftime("%Y%m%d%H%M%S")
-  random_string = ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
-  return timestamp + '_' + random_string
+  now = int(time.time())
+  # strftime is comparatively expensive, so bursts within the same
+  # second reuse the formatted timestamp
+  if now != _TIMESTAMP_CACHE[0]:
+    _TIMESTAMP_CACHE[0] = now
+    _TIMESTAMP_CACHE[1] = time.strftime("%Y%m%d%H%M%S")
+  random_string = bytes(_ALPHABET[b % len(_ALPHABET)] for b in os.urandom(length)).decode()
+  return _TIMESTAMP_CACHE[1] + '_' + random_string
+
+
+# [last int(time.time()), formatted timestamp] shared by get_random_string
+_TIMESTAMP_CACHE = [0, '']
 
 
 # https://stackoverflow.com/a/57915246
@@ -166,7 +485,19 @@ class NumpyEncoder(json.JSONEncoder):
   -------
     JSONEncoder object with necessary methods to encode numpy types
   """
+  # exact-type dispatch resolved with one dict lookup; the isinstance
+  # ladder below only runs for numpy subclasses not listed here
+  _DISPATCH = {
+    np.int8: int, np.int16: int, np.int32: int, np.int64: int,
+    np.uint8: int, np.uint16: int, np.uint32: int, np.uint64: int,
+    np.float16: float, np.float32: float, np.float64: float,
+    np.ndarray: np.ndarray.tolist,
+  }
+
   def default(self, obj):
+    fn = self._DISPATCH.get(type(obj))
+    if fn is not None:
+      return fn(obj)
     if isinstance(obj, np.integer):
       return int(obj)
     elif isinstance(obj, np.floating):
@@ -1,10 +1,30 @@
-from flask import Flask, request, make_response, jsonify
+from flask import Flask, request, make_response
 from CodePlagDetector import CodePlagiarismDetector, defaults
+from CodePlagDetector.utils import get_random_string, invalidate_listing_cache
 
-from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
 
 app = Flask(__name__)
 
+# plagiarism runs take minutes; they execute on this pool so the WSGI
+# worker is freed as soon as the job is accepted
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+# job_id -> Future for the submitted runs of this process
+_JOBS = {}
+
+
+def _run_and_cleanup(cp_detector):
+  """
+  Execute the full detector pipeline and always clean up the scan
+  directory, even when a stage fails.
+  """
+  try:
+    cp_detector.initialize()
+    cp_detector.run()
+    cp_detector.upload_reports()
+  finally:
+    cp_detector.clean_up()
+
 
 @app.route('/hello')
 def index():
@@ -16,56 +36,79 @@ def plagiarism_checker():
   """
   This function will be called when the user will hit the /plagiarism_checker
   endpoint with a POST request
-  
+
   SAMPLE REQUEST BODY:
   --------------------
     {
-    "bucket": "bucket_name",  # Name of the bucket where the files are stored
-    "prefix": "prefix_name",  # Prefix of the files in the bucket where boilerplate and
-                              # student code files are stored
+    "bucket": "bucket_name",    # Name of the bucket where the files are stored
+    "sprefix": "prefix_name",   # Prefix of the student submission files in the bucket
+    "bprefix": "prefix_name",   # Prefix of the boilerplate files in the bucket
     }
-  
-  few other opointsional fields are: extensions, noise_t, guarantee_t, same_name_only, display_t
+
+  few other optional fields are: extensions, noise_t, guarantee_t, same_name_only,
+  display_t, fsd, pretty.
   Please refer to the CodePlagiarismDetector class for more details.
-  
-  SAMPLE RESPONSE:
-  ----------------
+
+  SAMPLE RESPONSE (202 Accepted):
+  -------------------------------
     {
-      "status": "success",
-      "message": "Plagiarism check completed successfully",
+      "status": "accepted",
+      "job_id": "20230101120000_ABCDEFGHIJ",
     }
+
+  The run executes in the background; poll
+  GET /api/v1/plagiarism_checker/<job_id> for the result.
   """
   print('\n*****************************************************************')
   # Get the data from the POST request.
   data = request.get_json(force=True)
   # check for mandatory fields
-  if 'bucket' not in data or 'prefix' not in data:
-    return make_response({'status': 'Error', 'message': 'bucket and prefix are mandatory fields'}, 400)
+  if 'bucket' not in data or 'sprefix' not in data or 'bprefix' not in data:
+    return make_response(
+      {'status': 'Error', 'message': 'bucket, sprefix and bprefix are mandatory fields'}, 400)
 
-  cp_detector = None
   try:
     cp_detector = CodePlagiarismDetector(
       bucket_name=data.get('bucket'),
-      prefix=data.get('prefix'),
+      sprefix=data.get('sprefix'),
+      bprefix=data.get('bprefix'),
       extensions=data.get('extensions', defaults.EXTENSIONS),
       noise_t=data.get('noise_t', defaults.NOISE_THRESHOLD),
       guarantee_t=data.get('guarantee_t', defaults.GUARANTEE_THRESHOLD),
       same_name_only=data.get('same_name_only', defaults.SAME_NAME_ONLY),
-      display_t = data.get('display_t', defaults.DISPLAY_THRESHOLD),
+      display_t=data.get('display_t', defaults.DISPLAY_THRESHOLD),
+      fsd=data.get('fsd', False),
+      pretty=data.get('pretty', defaults.PRETTY),
     )
-    cp_detector.initialize()
-    cp_detector.run()
-    cp_detector.upload_reports()
-
   except Exception as e:  # later we can make use of specific exceptions if needed
     return make_response({'status': 'Error', 'message': str(e)}, 400)
-  finally:
-    if cp_detector is not None: cp_detector.clean_up()
-    print('*****************************************************************\n')
 
-  return make_response({'status': 'success', 'message': 'Plagiarism check completed successfully'}, 200)
+  # a POST means the caller believes new submissions landed, so the
+  # cached listings for both prefixes must not serve this job
+  invalidate_listing_cache(data['bucket'], cp_detector.sprefix)
+  invalidate_listing_cache(data['bucket'], cp_detector.bprefix)
+
+  job_id = get_random_string(10)
+  _JOBS[job_id] = _EXECUTOR.submit(_run_and_cleanup, cp_detector)
+  return make_response({'status': 'accepted', 'job_id': job_id}, 202)
+
 
+@app.route('/api/v1/plagiarism_checker/<job_id>', methods=['GET'])
+def plagiarism_checker_status(job_id):
+  """
+  Report the status of a previously accepted plagiarism run.
+  """
+  future = _JOBS.get(job_id)
+  if future is None:
+    return make_response({'status': 'Error', 'message': 'unknown job_id'}, 404)
+  if not future.done():
+    return make_response({'status': 'running'}, 200)
+  error = future.exception()
+  if error is not None:
+    return make_response({'status': 'Error', 'message': str(error)}, 200)
+  return make_response(
+    {'status': 'success', 'message': 'Plagiarism check completed successfully'}, 200)
 
 
 if __name__ == '__main__':
-  app.run(host="0.0.0.0", port=5000)
\ No newline at end of file
+  app.run(host="0.0.0.0", port=5000)